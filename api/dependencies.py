@@ -3,6 +3,8 @@ import openai
 import chromadb
 from chromadb.utils import embedding_functions
 
+from retrieval import CachedRetriever
+
 # OpenAI Client
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
@@ -16,6 +18,7 @@ EMBEDDING_MODEL = "text-embedding-3-small"
 
 db_client = chromadb.PersistentClient(path=CHROMA_PATH)
 openai_ef = embedding_functions.OpenAIEmbeddingFunction(api_key=api_key, model_name=EMBEDDING_MODEL)
-collection = db_client.get_collection(name=COLLECTION_NAME, embedding_function=openai_ef)
+# Cached + batched retrieval in front of the collection (see retrieval.py)
+retriever = CachedRetriever(db_client, COLLECTION_NAME, openai_ef)
 
-print("Dependencies (OpenAI client and ChromaDB collection) initialized successfully.")
\ No newline at end of file
+print("Dependencies (OpenAI client, ChromaDB collection and retriever) initialized successfully.")
\ No newline at end of file
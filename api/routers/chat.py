@@ -6,7 +6,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 
 from api.models import ChatRequest
-from api.dependencies import collection, openai_client
+from api.dependencies import openai_client, retriever
 from book_tools import get_summary_by_title
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -83,7 +83,7 @@ async def chat_handler(request: ChatRequest):
     print(f"-> Received prompt for streaming: '{request.prompt}'")
     
     # Retrieval (RAG)
-    results = collection.query(query_texts=[request.prompt], n_results=3)
+    results = await retriever.aquery(request.prompt, n_results=3)
     context = "\n\n".join(results['documents'][0])
     
     # Augmentation
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import hashlib
+import random
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from retrieval import CachedRetriever
+
+# Constants
+COLLECTION_NAME = "benchmark_summaries"
+ADD_BATCH_SIZE = 5000
+
+
+class HashEmbeddingFunction(EmbeddingFunction):
+    """
+    Deterministic offline embedding: a unit vector seeded from the text's hash.
+    Keeps the benchmark free of OpenAI calls while still going through the same code path.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def __call__(self, input):
+        embeddings = []
+        for text in input:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            embeddings.append(vector / np.linalg.norm(vector))
+        return embeddings
+
+
+def build_collection(client, embedding_function, num_docs, dim):
+    """
+    Creates a collection with `num_docs` random unit vectors and short documents.
+    """
+    print(f"Building collection with {num_docs} documents (dim={dim})...")
+    collection = client.create_collection(name=COLLECTION_NAME, embedding_function=embedding_function)
+    rng = np.random.default_rng(0)
+    for start in range(0, num_docs, ADD_BATCH_SIZE):
+        end = min(start + ADD_BATCH_SIZE, num_docs)
+        vectors = rng.standard_normal((end - start, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        collection.add(
+            ids=[f"doc_{i}" for i in range(start, end)],
+            embeddings=vectors.tolist(),
+            documents=[f"Summary of book number {i}." for i in range(start, end)],
+            metadatas=[{"title": f"Book {i}"} for i in range(start, end)]
+        )
+    return collection
+
+
+async def run_workload(query_fn, prompts, concurrency):
+    """
+    Issues all prompts from `concurrency` workers and returns the achieved QPS.
+    """
+    queue = iter(prompts)
+
+    async def worker():
+        for prompt in queue:
+            await query_fn(prompt)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(prompts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG retrieval QPS with and without CachedRetriever.")
+    parser.add_argument("--docs", type=int, default=100_000, help="Number of documents in the collection.")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension (text-embedding-3-small is 1536).")
+    parser.add_argument("--queries", type=int, default=2000, help="Total number of queries to issue.")
+    parser.add_argument("--unique", type=int, default=500, help="Number of distinct prompts in the workload.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Number of concurrent clients.")
+    parser.add_argument("--n-results", type=int, default=3)
+    args = parser.parse_args()
+
+    embedding_function = HashEmbeddingFunction(args.dim)
+    rng = random.Random(0)
+    prompts = [f"prompt {rng.randrange(args.unique)}" for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as path:
+        client = chromadb.PersistentClient(path=path)
+        collection = build_collection(client, embedding_function, args.docs, args.dim)
+
+        async def baseline_query(prompt):
+            await asyncio.to_thread(collection.query, query_texts=[prompt], n_results=args.n_results)
+
+        print(f"Running {args.queries} queries ({args.unique} unique) with concurrency {args.concurrency}...")
+        baseline_qps = asyncio.run(run_workload(baseline_query, prompts, args.concurrency))
+        print(f"Baseline (collection.query per prompt): {baseline_qps:.1f} QPS")
+
+        retriever = CachedRetriever(client, COLLECTION_NAME, embedding_function, cache_size=args.unique * 2)
+
+        async def cached_query(prompt):
+            await retriever.aquery(prompt, n_results=args.n_results)
+
+        cached_qps = asyncio.run(run_workload(cached_query, prompts, args.concurrency))
+        print(f"CachedRetriever (cache + batching):     {cached_qps:.1f} QPS "
+              f"(hits={retriever.hits}, misses={retriever.misses})")
+        print(f"Speedup: {cached_qps / baseline_qps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from chromadb.utils import embedding_functions
 
 # Import our custom tool function
 from book_tools import get_summary_by_title
+from retrieval import CachedRetriever
 
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
@@ -21,7 +22,7 @@ CHROMA_PATH = "./chroma_db"
 COLLECTION_NAME = "book_summaries"
 EMBEDDING_MODEL = "text-embedding-3-small"
 
-# Initialize ChromaDB client and get the collection
+# Initialize ChromaDB client and the retriever over the collection
 print("Connecting to Vector DB...")
 client = chromadb.PersistentClient(path=CHROMA_PATH)
 
@@ -30,10 +31,8 @@ openai_ef = embedding_functions.OpenAIEmbeddingFunction(
     api_key=api_key,
     model_name=EMBEDDING_MODEL
 )
-collection = client.get_collection(
-    name=COLLECTION_NAME,
-    embedding_function=openai_ef
-)
+# Gets the collection and caches top-k results so repeated prompts skip the vector search
+retriever = CachedRetriever(client, COLLECTION_NAME, openai_ef)
 print("Connection successful.")
 
 def is_prompt_inappropriate(prompt: str) -> bool:
@@ -69,7 +68,7 @@ def get_book_recommendation(user_prompt: str, advanced_flow: bool = True):
     """
 
     print("-> Retrieving relevant context from the database...")
-    results = collection.query(query_texts=[user_prompt], n_results=3)
+    results = retriever.query(user_prompt, n_results=3)
     context = "\n\n".join(results['documents'][0])
 
     tools = [
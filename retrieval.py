@@ -0,0 +1,239 @@
+import asyncio
+import copy
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Metadata key that setup_vectordb.py bumps every time it (re)loads the collection.
+COLLECTION_VERSION_KEY = "version"
+
+DEFAULT_N_RESULTS = 3
+DEFAULT_INCLUDE = ("documents", "metadatas", "distances")
+
+
+class _LRUCache:
+    """
+    A small thread-safe LRU mapping, bounded by number of entries.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CachedRetriever:
+    """
+    Retrieval layer in front of a ChromaDB collection.
+
+    - Prompt embeddings are cached by exact text, so a repeated prompt is not re-embedded.
+    - Top-k results are cached by the quantized query embedding, so a repeated (or
+      near-identical) query skips the ANN search and the SQLite document fetch.
+    - The result cache is tied to the collection version written by setup_vectordb.py;
+      when the collection is reloaded or recreated, old results are dropped.
+    - `aquery` merges queries arriving within `batch_window` seconds into a single
+      multi-query `collection.query` call (and a single embedding request).
+
+    `query` returns the same shape as `collection.query` for one query text, so
+    `results['documents'][0]` keeps working for callers.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection_name,
+        embedding_function,
+        cache_size=1024,
+        quantization_step=1e-3,
+        batch_window=0.005,
+        max_batch_size=32,
+        version_check_interval=5.0,
+        include=DEFAULT_INCLUDE,
+    ):
+        self._client = client
+        self._collection_name = collection_name
+        self._embedding_function = embedding_function
+        self.quantization_step = quantization_step
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.version_check_interval = version_check_interval
+        self.include = list(include)
+
+        self._embeddings = _LRUCache(cache_size)
+        self._results = _LRUCache(cache_size)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        self._version_lock = threading.Lock()
+        self._last_version_check = 0.0
+        self.collection = None
+        self.version = None
+        self._refresh_collection()
+
+        # Pending async queries, only touched from the event loop thread.
+        self._pending = []
+        self._flush_handle = None
+        # Strong references to in-flight batch tasks, so they are not garbage-collected mid-run.
+        self._tasks = set()
+
+    # --- Versioning ---
+
+    def _refresh_collection(self):
+        collection = self._client.get_collection(
+            name=self._collection_name,
+            embedding_function=self._embedding_function
+        )
+        # The id changes if the collection was deleted and recreated.
+        version = (str(collection.id), (collection.metadata or {}).get(COLLECTION_VERSION_KEY))
+        if version != self.version:
+            if self.version is not None:
+                print(f"Collection '{self._collection_name}' changed, clearing retrieval cache.")
+            self._results.clear()
+            self.collection = collection
+            self.version = version
+        self._last_version_check = time.monotonic()
+
+    def _check_version(self):
+        if time.monotonic() - self._last_version_check < self.version_check_interval:
+            return
+        with self._version_lock:
+            if time.monotonic() - self._last_version_check >= self.version_check_interval:
+                self._refresh_collection()
+
+    # --- Caching ---
+
+    def _embed(self, texts):
+        """
+        Returns one embedding per text, embedding all cache misses in a single call.
+        """
+        embeddings = [self._embeddings.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, emb in zip(texts, embeddings) if emb is None))
+        if missing:
+            computed = {
+                text: [float(v) for v in emb]
+                for text, emb in zip(missing, self._embedding_function(missing))
+            }
+            for text, emb in computed.items():
+                self._embeddings.put(text, emb)
+            embeddings = [emb if emb is not None else computed[text] for text, emb in zip(texts, embeddings)]
+        return embeddings
+
+    def _cache_key(self, version, embedding, n_results):
+        quantized = array("i", (round(v / self.quantization_step) for v in embedding))
+        digest = hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+        return (version, n_results, digest)
+
+    def _query_many(self, texts, n_results):
+        """
+        Runs retrieval for several texts at once and returns one single-query result per text.
+        """
+        self._check_version()
+        version = self.version
+        collection = self.collection
+
+        embeddings = self._embed(texts)
+        keys = [self._cache_key(version, emb, n_results) for emb in embeddings]
+        rows = [self._results.get(key) for key in keys]
+
+        # Identical keys within one batch are only searched once.
+        to_search = {}
+        for key, emb, row in zip(keys, embeddings, rows):
+            if row is None:
+                to_search.setdefault(key, emb)
+        with self._stats_lock:
+            self.hits += len(rows) - len(to_search)
+            self.misses += len(to_search)
+
+        if to_search:
+            results = collection.query(
+                query_embeddings=list(to_search.values()),
+                n_results=n_results,
+                include=self.include
+            )
+            fields = ["ids", *self.include]
+            searched = {}
+            for i, key in enumerate(to_search):
+                searched[key] = {field: [results[field][i]] for field in fields}
+                self._results.put(key, searched[key])
+            rows = [row if row is not None else searched[key] for key, row in zip(keys, rows)]
+        # Callers get their own copy, so mutating a result never touches the cached entry.
+        return [copy.deepcopy(row) for row in rows]
+
+    # --- Public API ---
+
+    def query(self, text, n_results=DEFAULT_N_RESULTS):
+        """
+        Synchronous, cached retrieval for a single text (no batching).
+        """
+        return self._query_many([text], n_results)[0]
+
+    async def aquery(self, text, n_results=DEFAULT_N_RESULTS):
+        """
+        Cached retrieval for a single text, batched with other concurrent `aquery` calls.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, n_results, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+
+        loop = asyncio.get_running_loop()
+        groups = {}
+        for text, n_results, future in batch:
+            groups.setdefault(n_results, []).append((text, future))
+        for n_results, items in groups.items():
+            task = loop.create_task(self._run_batch(items, n_results))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items, n_results):
+        texts = [text for text, _ in items]
+        try:
+            rows = await asyncio.to_thread(self._query_many, texts, n_results)
+        except Exception as e:
+            if len(items) == 1:
+                _, future = items[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # One bad prompt (e.g. rejected by the embedding API) must not fail the whole
+            # batch, so retry each item on its own and only fail the offending ones.
+            await asyncio.gather(*(self._run_batch([item], n_results) for item in items))
+            return
+        for (_, future), row in zip(items, rows):
+            if not future.done():
+                future.set_result(row)
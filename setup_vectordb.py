@@ -1,9 +1,12 @@
 import chromadb
 import os
+import time
 import openai
 from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
 
+from retrieval import COLLECTION_VERSION_KEY
+
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -74,6 +77,9 @@ def main():
         metadatas=metadatas
     )
 
+    # Bump the collection version so running servers drop their cached retrieval results
+    collection.modify(metadata={COLLECTION_VERSION_KEY: str(time.time_ns())})
+
     print(f"Successfully loaded {collection.count()} documents into the collection.")
     print("--- Vector DB Setup Complete ---")
 
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from retrieval import COLLECTION_VERSION_KEY, CachedRetriever
+
+
+class FakeCollection:
+    def __init__(self):
+        self.id = "collection-1"
+        self.metadata = {COLLECTION_VERSION_KEY: "1"}
+        self.query_batches = []
+
+    def query(self, query_embeddings, n_results, include):
+        self.query_batches.append(len(query_embeddings))
+        rows = [f"doc-{emb[0]}" for emb in query_embeddings]
+        return {
+            "ids": [[row] for row in rows],
+            "documents": [[row] for row in rows],
+            "metadatas": [[{"title": row}] for row in rows],
+            "distances": [[0.1] for _ in rows],
+        }
+
+
+class FakeClient:
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def get_collection(self, name, embedding_function):
+        return self.collection
+
+
+class FakeEmbeddingFunction:
+    """
+    Maps each text to a distinct vector and rejects empty strings, like the OpenAI API does.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        if any(not text for text in input):
+            raise ValueError("empty input")
+        return [[float(sum(map(ord, text))), 0.5, 0.25] for text in input]
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def retriever(client):
+    return CachedRetriever(client, "books", FakeEmbeddingFunction(), version_check_interval=0)
+
+
+def test_repeated_query_is_served_from_cache(retriever, client):
+    first = retriever.query("dragons")
+    second = retriever.query("dragons")
+
+    assert first == second
+    assert client.collection.query_batches == [1]
+    assert (retriever.hits, retriever.misses) == (1, 1)
+
+
+def test_mutating_a_result_does_not_change_the_cache(retriever):
+    first = retriever.query("dragons")
+    expected = [list(docs) for docs in first["documents"]]
+    first["documents"][0].append("junk")
+
+    assert retriever.query("dragons")["documents"] == expected
+
+
+def test_version_change_invalidates_cache(retriever, client):
+    retriever.query("dragons")
+    client.collection.metadata = {COLLECTION_VERSION_KEY: "2"}
+    retriever.query("dragons")
+
+    assert client.collection.query_batches == [1, 1]
+    assert retriever.misses == 2
+
+
+def test_concurrent_aqueries_are_merged(retriever, client):
+    async def run():
+        return await asyncio.gather(*(retriever.aquery(f"prompt {i % 3}") for i in range(6)))
+
+    results = asyncio.run(run())
+
+    assert client.collection.query_batches == [3]
+    assert [r["documents"] for r in results[:3]] == [r["documents"] for r in results[3:]]
+
+
+def test_bad_prompt_only_fails_its_own_request(retriever):
+    async def run():
+        return await asyncio.gather(retriever.aquery("ok"), retriever.aquery(""), return_exceptions=True)
+
+    ok, bad = asyncio.run(run())
+
+    assert ok["documents"] == [["doc-218.0"]]
+    assert isinstance(bad, ValueError)